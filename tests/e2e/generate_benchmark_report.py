@@ -15,10 +15,19 @@ Usage:
 """
 
 import argparse
-import json
+import functools
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from datetime import datetime
+from typing import BinaryIO
+
+# Prefer orjson (C extension) for parsing summaries, falling back to the
+# stdlib json module when it is not installed.
+try:
+    from orjson import loads as _loads
+except ImportError:
+    from json import loads as _loads
 
 # Default benchmarks directory
 DEFAULT_BENCHMARKS_DIR = Path(__file__).parent.parent.parent / "build" / "benchmarks"
@@ -28,38 +37,54 @@ BENCHMARKS_DIR: Path = DEFAULT_BENCHMARKS_DIR
 
 # Preferred order for display (modes not in this list appear at the end alphabetically)
 MODE_ORDER = ["dpdk", "tokio", "tokio-local", "kimojio", "kimojio-poll"]
+_MODE_RANK = {mode: i for i, mode in enumerate(MODE_ORDER)}
 
 # Color palette for charts
 CHART_COLORS = ["#3366cc", "#ff9900", "#33cc33", "#9933ff", "#cc3366", "#33cccc", "#cc6633"]
 COLOR_NAMES = ["blue", "orange", "green", "purple", "pink", "cyan", "brown"]
 
+# Shared read-only default for missing results/latency (avoids a {} per miss)
+_EMPTY: dict = {}
 
-def discover_modes() -> list[str]:
-    """Discover available modes by scanning for directories with summary.json."""
-    if not BENCHMARKS_DIR.exists():
-        return []
-    
+
+def discover_modes() -> list[str] | None:
+    """Discover available modes by scanning for directories with summary.json.
+
+    Returns None if the benchmarks directory does not exist.
+    """
+    # DirEntry.is_dir() uses the type cached from the directory listing,
+    # so only the summary.json probe costs a stat() per entry
     modes = []
-    for entry in BENCHMARKS_DIR.iterdir():
-        if entry.is_dir() and (entry / "summary.json").exists():
-            modes.append(entry.name)
+    try:
+        with os.scandir(BENCHMARKS_DIR) as it:
+            for entry in it:
+                if entry.is_dir() and os.path.exists(os.path.join(entry.path, "summary.json")):
+                    modes.append(entry.name)
+    except FileNotFoundError:
+        return None
     
     # Sort: known modes first in preferred order, then unknown modes alphabetically
     def sort_key(mode):
-        if mode in MODE_ORDER:
-            return (0, MODE_ORDER.index(mode))
+        rank = _MODE_RANK.get(mode)
+        if rank is not None:
+            return (0, rank)
         return (1, mode)
     
     return sorted(modes, key=sort_key)
 
 
-def load_summary(mode: str) -> dict | None:
-    """Load summary.json for a given mode."""
-    summary_path = BENCHMARKS_DIR / mode / "summary.json"
-    if not summary_path.exists():
+def load_summary(mode: str) -> tuple[dict, bytes] | None:
+    """Load summary.json for a given mode.
+
+    Returns the parsed summary along with the file's raw bytes.
+    """
+    summary_path = os.path.join(BENCHMARKS_DIR, mode, "summary.json")
+    try:
+        with open(summary_path, "rb") as f:
+            data = f.read()
+    except FileNotFoundError:
         return None
-    with open(summary_path) as f:
-        return json.load(f)
+    return _loads(data), data
 
 
 def get_results_by_connections(summary: dict) -> dict:
@@ -67,53 +92,135 @@ def get_results_by_connections(summary: dict) -> dict:
     return {r["connections"]: r for r in summary["results"]}
 
 
+@functools.lru_cache(maxsize=16)
 def get_chart_colors(num_modes: int) -> str:
     """Get comma-separated color palette for the given number of modes."""
     return ", ".join(CHART_COLORS[:num_modes])
 
 
-def add_legend(modes: list[str]) -> list[str]:
-    """Generate legend lines for the given modes."""
+def write_legend(fp: BinaryIO, modes: list[str]) -> None:
+    """Write the legend for the given modes."""
     legend_items = [f"{m} ({COLOR_NAMES[i % len(COLOR_NAMES)]})" for i, m in enumerate(modes)]
-    return ["", "**Legend:** " + " | ".join(legend_items), ""]
+    fp.write(("\n**Legend:** " + " | ".join(legend_items) + "\n\n").encode())
+
+
+def write_chart(
+    fp: BinaryIO,
+    title: str,
+    y_label: str,
+    y_min: int,
+    y_max: int,
+    x_values: list[int],
+    series,
+    colors: str,
+) -> None:
+    """Write a Mermaid xychart with one line per (name, values) series."""
+    fp.write((
+        "```mermaid\n"
+        "---\n"
+        "config:\n"
+        "    themeVariables:\n"
+        "        xyChart:\n"
+        f'            plotColorPalette: "{colors}"\n'
+        "---\n"
+        "xychart-beta\n"
+        f'    title "{title}"\n'
+        f'    x-axis "Connections" [{", ".join(map(str, x_values))}]\n'
+        f'    y-axis "{y_label}" {y_min} --> {y_max}\n'
+    ).encode())
+    for name, values in series:
+        fp.write(f'    line "{name}" [{", ".join(map(str, values))}]\n'.encode())
+    fp.write(b"```\n")
+
+
+def load_summaries(modes: list[str]) -> tuple[dict, dict]:
+    """Load and index the summaries for modes.
+
+    Returns (summaries, raw_summaries): results indexed by connection count
+    and the raw summary.json bytes, both keyed by mode.
+    """
+    raw_summaries = {}
+    summaries = {}
+    if not modes:
+        return summaries, raw_summaries
 
+    # Overlap file reads and parsing across modes
+    with ThreadPoolExecutor(max_workers=min(8, len(modes))) as ex:
+        loaded_summaries = list(ex.map(load_summary, modes))
 
-def generate_markdown() -> str:
-    """Generate the comparison Markdown content."""
-    # Discover and load all summaries
-    modes = discover_modes()
-    if not modes:
-        return "# Benchmark Comparison\n\nNo benchmark data found.\n"
-    
-    summaries = {}
-    for mode in modes:
-        summary = load_summary(mode)
+    for mode, loaded in zip(modes, loaded_summaries):
+        if loaded is None:
+            continue
+        summary, data = loaded
         if summary:
+            raw_summaries[mode] = data.rstrip()
             summaries[mode] = get_results_by_connections(summary)
+    return summaries, raw_summaries
+
 
+def write_markdown(
+    fp: BinaryIO,
+    modes: list[str],
+    summaries: dict,
+    raw_summaries: dict,
+) -> None:
+    """Write the comparison Markdown content for modes to fp, section by section.
+
+    fp is a binary file; sections are written as UTF-8.
+    """
     if not summaries:
-        return "# Benchmark Comparison\n\nNo benchmark data found.\n"
+        fp.write(b"# Benchmark Comparison\n\nNo benchmark data found.\n")
+        return
 
     # Get all connection counts (sorted)
-    all_connections = sorted(
-        set(c for results in summaries.values() for c in results.keys())
-    )
+    all_connections = sorted(set().union(*summaries.values()))
 
     chart_colors = get_chart_colors(len(modes))
 
-    # Build markdown
-    lines = [
-        "# Benchmark Comparison",
-        "",
-        f"Generated: {datetime.now().isoformat()}",
-        "",
-        f"Modes tested: {', '.join(modes)}",
-        "",
-        "## Summary",
-        "",
-        "| Mode | Connections | Requests/sec | MB/sec | p50 (μs) | p99 (μs) | Errors |",
-        "|------|-------------|--------------|--------|----------|----------|--------|",
-    ]
+    # Build per-mode value rows aligned with all_connections (missing
+    # connection counts read as 0), finding the y-axis maxima in the same pass
+    rows = {}
+    max_rps = max_mbps = max_p50 = max_p90 = max_p99 = 0
+    for mode, results in summaries.items():
+        row = {"rps": [], "mbps": [], "p50": [], "p90": [], "p99": []}
+        for c in all_connections:
+            r = results.get(c, _EMPTY)
+            lat = r.get("latency") or _EMPTY
+            rps = r.get("requests_per_sec", 0)
+            mbps = r.get("mb_per_sec", 0)
+            p50 = lat.get("p50_us", 0)
+            p90 = lat.get("p90_us", 0)
+            p99 = lat.get("p99_us", 0)
+            row["rps"].append(rps)
+            row["mbps"].append(mbps)
+            row["p50"].append(p50)
+            row["p90"].append(p90)
+            row["p99"].append(p99)
+            max_rps = max(max_rps, rps)
+            max_mbps = max(max_mbps, mbps)
+            max_p50 = max(max_p50, p50)
+            max_p90 = max(max_p90, p90)
+            max_p99 = max(max_p99, p99)
+        rows[mode] = row
+    y_max_rps = int(max_rps * 1.1)
+    y_max_mbps = int(max_mbps * 1.1)
+    y_max_p50 = int(max_p50 * 1.2)
+    y_max_p90 = int(max_p90 * 1.2)
+    y_max_p99 = int(max_p99 * 1.2)
+
+    # Write markdown
+    fp.write((
+        "# Benchmark Comparison\n"
+        "\n"
+        f"Generated: {time.strftime('%Y-%m-%dT%H:%M:%S')}\n"
+        "\n"
+        f"Modes tested: {', '.join(modes)}\n"
+        "\n"
+        "## Summary\n"
+        "\n"
+        "| Mode | Connections | Requests/sec | MB/sec | p50 (μs) | p99 (μs) | Errors |\n"
+        "|------|-------------|--------------|--------|----------|----------|--------|\n"
+    ).encode())
 
     for mode in modes:
         if mode not in summaries:
@@ -122,86 +229,31 @@ def generate_markdown() -> str:
             if conn not in summaries[mode]:
                 continue
             r = summaries[mode][conn]
-            lat = r.get("latency", {})
-            lines.append(
+            lat = r.get("latency") or _EMPTY
+            fp.write((
                 f"| {mode} | {conn} | {r['requests_per_sec']:.0f} | {r['mb_per_sec']:.1f} | "
-                f"{lat.get('p50_us', 'N/A')} | {lat.get('p99_us', 'N/A')} | {r['errors']} |"
-            )
+                f"{lat.get('p50_us', 'N/A')} | {lat.get('p99_us', 'N/A')} | {r['errors']} |\n"
+            ).encode())
 
     # Throughput chart
-    lines.extend([
-        "",
-        "## Throughput Comparison",
-        "",
-        "```mermaid",
-        "---",
-        "config:",
-        "    themeVariables:",
-        "        xyChart:",
-        f'            plotColorPalette: "{chart_colors}"',
-        "---",
-        "xychart-beta",
-        '    title "Requests per Second by Connection Count"',
-        f'    x-axis "Connections" [{", ".join(str(c) for c in all_connections)}]',
-    ])
-
-    # Find max for y-axis
-    max_rps = max(
-        r["requests_per_sec"]
-        for results in summaries.values()
-        for r in results.values()
+    fp.write(b"\n## Throughput Comparison\n\n")
+    write_chart(
+        fp, "Requests per Second by Connection Count", "Requests/sec",
+        0, y_max_rps, all_connections,
+        [(mode, map(int, rows[mode]["rps"])) for mode in modes if mode in rows],
+        chart_colors,
     )
-    y_max = int(max_rps * 1.1)
-    lines.append(f'    y-axis "Requests/sec" 0 --> {y_max}')
-
-    for mode in modes:
-        if mode not in summaries:
-            continue
-        values = [
-            str(int(summaries[mode].get(c, {}).get("requests_per_sec", 0)))
-            for c in all_connections
-        ]
-        lines.append(f'    line "{mode}" [{", ".join(values)}]')
-
-    lines.append("```")
-    lines.extend(add_legend(modes))
+    write_legend(fp, modes)
 
     # Bandwidth chart (MB/sec)
-    lines.extend([
-        "",
-        "## Bandwidth Comparison",
-        "",
-        "```mermaid",
-        "---",
-        "config:",
-        "    themeVariables:",
-        "        xyChart:",
-        f'            plotColorPalette: "{chart_colors}"',
-        "---",
-        "xychart-beta",
-        '    title "MB per Second by Connection Count"',
-        f'    x-axis "Connections" [{", ".join(str(c) for c in all_connections)}]',
-    ])
-
-    max_mbps = max(
-        r["mb_per_sec"]
-        for results in summaries.values()
-        for r in results.values()
+    fp.write(b"\n## Bandwidth Comparison\n\n")
+    write_chart(
+        fp, "MB per Second by Connection Count", "MB/sec",
+        0, y_max_mbps, all_connections,
+        [(mode, map(int, rows[mode]["mbps"])) for mode in modes if mode in rows],
+        chart_colors,
     )
-    y_max_mbps = int(max_mbps * 1.1)
-    lines.append(f'    y-axis "MB/sec" 0 --> {y_max_mbps}')
-
-    for mode in modes:
-        if mode not in summaries:
-            continue
-        values = [
-            str(int(summaries[mode].get(c, {}).get("mb_per_sec", 0)))
-            for c in all_connections
-        ]
-        lines.append(f'    line "{mode}" [{", ".join(values)}]')
-
-    lines.append("```")
-    lines.extend(add_legend(modes))
+    write_legend(fp, modes)
 
     # DPDK improvement percentage helper
     def calc_improvement(dpdk_val, other_val):
@@ -214,353 +266,102 @@ def generate_markdown() -> str:
     if "dpdk" in summaries:
         other_modes = [m for m in modes if m != "dpdk" and m in summaries]
         if other_modes:
-            improvement_colors = get_chart_colors(len(other_modes))
-            lines.extend([
-                "",
-                "## DPDK Throughput Improvement",
-                "",
-                "Percentage improvement of DPDK over other modes (positive = DPDK is faster).",
-                "",
-                "```mermaid",
-                "---",
-                "config:",
-                "    themeVariables:",
-                "        xyChart:",
-                f'            plotColorPalette: "{improvement_colors}"',
-                "---",
-                "xychart-beta",
-                '    title "DPDK Throughput Improvement (%)"',
-                f'    x-axis "Connections" [{", ".join(str(c) for c in all_connections)}]',
-            ])
-
-            # Calculate min/max for y-axis
-            all_improvements = []
-            for other_mode in other_modes:
-                for c in all_connections:
-                    dpdk_val = summaries["dpdk"].get(c, {}).get("requests_per_sec", 0)
-                    other_val = summaries[other_mode].get(c, {}).get("requests_per_sec", 0)
-                    all_improvements.append(calc_improvement(dpdk_val, other_val))
-
-            y_min = int(min(all_improvements) - 10)
-            y_max = int(max(all_improvements) + 10)
-            lines.append(f'    y-axis "Improvement (%)" {y_min} --> {y_max}')
-
+            # Calculate improvements once, tracking min/max for the y-axis
+            improvements = {}
+            min_improvement = max_improvement = None
+            dpdk_rps = rows["dpdk"]["rps"]
             for other_mode in other_modes:
                 values = []
-                for c in all_connections:
-                    dpdk_val = summaries["dpdk"].get(c, {}).get("requests_per_sec", 0)
-                    other_val = summaries[other_mode].get(c, {}).get("requests_per_sec", 0)
+                for dpdk_val, other_val in zip(dpdk_rps, rows[other_mode]["rps"]):
                     improvement = calc_improvement(dpdk_val, other_val)
-                    values.append(str(int(improvement)))
-                lines.append(f'    line "vs {other_mode}" [{", ".join(values)}]')
-
-            lines.append("```")
+                    if min_improvement is None or improvement < min_improvement:
+                        min_improvement = improvement
+                    if max_improvement is None or improvement > max_improvement:
+                        max_improvement = improvement
+                    values.append(int(improvement))
+                improvements[f"vs {other_mode}"] = values
+
+            fp.write(
+                b"\n"
+                b"## DPDK Throughput Improvement\n"
+                b"\n"
+                b"Percentage improvement of DPDK over other modes (positive = DPDK is faster).\n"
+                b"\n"
+            )
+            write_chart(
+                fp, "DPDK Throughput Improvement (%)", "Improvement (%)",
+                int(min_improvement - 10), int(max_improvement + 10), all_connections,
+                improvements.items(),
+                get_chart_colors(len(other_modes)),
+            )
             # Dynamic legend for improvement chart
-            improvement_legend_items = [
-                f"vs {m} ({COLOR_NAMES[i % len(COLOR_NAMES)]})"
-                for i, m in enumerate(other_modes)
-            ]
-            lines.extend([
-                "",
-                "**Legend:** " + " | ".join(improvement_legend_items),
-                "",
-            ])
-
-    # Latency p50 chart
-    lines.extend([
-        "",
-        "## Latency Comparison (p50)",
-        "",
-        "```mermaid",
-        "---",
-        "config:",
-        "    themeVariables:",
-        "        xyChart:",
-        f'            plotColorPalette: "{chart_colors}"',
-        "---",
-        "xychart-beta",
-        '    title "p50 Latency by Connection Count"',
-        f'    x-axis "Connections" [{", ".join(str(c) for c in all_connections)}]',
-    ])
-
-    max_p50 = max(
-        r.get("latency", {}).get("p50_us", 0)
-        for results in summaries.values()
-        for r in results.values()
-    )
-    y_max_lat = int(max_p50 * 1.2)
-    lines.append(f'    y-axis "Latency (μs)" 0 --> {y_max_lat}')
-
-    for mode in modes:
-        if mode not in summaries:
-            continue
-        values = [
-            str(summaries[mode].get(c, {}).get("latency", {}).get("p50_us", 0))
-            for c in all_connections
-        ]
-        lines.append(f'    line "{mode}" [{", ".join(values)}]')
+            write_legend(fp, list(improvements))
 
-    lines.append("```")
-    lines.extend(add_legend(modes))
-
-    # Latency p50 chart (low connections - first 4 points)
+    # Latency charts, each followed by a zoomed-in chart of the first 4 points
     low_connections = all_connections[:4]
-    if len(low_connections) > 1:
-        lines.extend([
-            "",
-            "### p50 Latency (Low Connections)",
-            "",
-            "```mermaid",
-            "---",
-            "config:",
-            "    themeVariables:",
-            "        xyChart:",
-            f'            plotColorPalette: "{chart_colors}"',
-            "---",
-            "xychart-beta",
-            '    title "p50 Latency (Low Connection Counts)"',
-            f'    x-axis "Connections" [{", ".join(str(c) for c in low_connections)}]',
-        ])
-
-        max_p50_low = max(
-            summaries[mode].get(c, {}).get("latency", {}).get("p50_us", 0)
-            for mode in modes if mode in summaries
-            for c in low_connections
+    num_low = len(low_connections)
+    for pct, y_max_lat in (("p50", y_max_p50), ("p90", y_max_p90), ("p99", y_max_p99)):
+        fp.write(f"\n## Latency Comparison ({pct})\n\n".encode())
+        write_chart(
+            fp, f"{pct} Latency by Connection Count", "Latency (μs)",
+            0, y_max_lat, all_connections,
+            [(mode, rows[mode][pct]) for mode in modes if mode in rows],
+            chart_colors,
         )
-        y_max_lat_low = int(max_p50_low * 1.2) if max_p50_low > 0 else 100
-        lines.append(f'    y-axis "Latency (μs)" 0 --> {y_max_lat_low}')
-
-        for mode in modes:
-            if mode not in summaries:
-                continue
-            values = [
-                str(summaries[mode].get(c, {}).get("latency", {}).get("p50_us", 0))
-                for c in low_connections
-            ]
-            lines.append(f'    line "{mode}" [{", ".join(values)}]')
-
-        lines.append("```")
-        lines.extend(add_legend(modes))
-
-        # Calculate DPDK latency improvement at last low-connection point
-        if "dpdk" in summaries and len(low_connections) > 0:
-            last_conn = low_connections[-1]
-            dpdk_lat = summaries["dpdk"].get(last_conn, {}).get("latency", {}).get("p50_us", 0)
-            other_lats = [
-                summaries[m].get(last_conn, {}).get("latency", {}).get("p50_us", 0)
-                for m in modes if m != "dpdk" and m in summaries
-            ]
-            if other_lats and dpdk_lat > 0:
-                best_other = min(lat for lat in other_lats if lat > 0) if any(lat > 0 for lat in other_lats) else 0
-                if best_other > 0:
-                    improvement = ((best_other - dpdk_lat) / best_other) * 100
-                    lines.append("")
-                    lines.append(f"**DPDK p50 latency improvement at {last_conn} connections: {improvement:+.1f}%** (positive = DPDK is faster)")
-
-    # Latency p90 chart
-    lines.extend([
-        "",
-        "## Latency Comparison (p90)",
-        "",
-        "```mermaid",
-        "---",
-        "config:",
-        "    themeVariables:",
-        "        xyChart:",
-        f'            plotColorPalette: "{chart_colors}"',
-        "---",
-        "xychart-beta",
-        '    title "p90 Latency by Connection Count"',
-        f'    x-axis "Connections" [{", ".join(str(c) for c in all_connections)}]',
-    ])
-
-    max_p90 = max(
-        r.get("latency", {}).get("p90_us", 0)
-        for results in summaries.values()
-        for r in results.values()
-    )
-    y_max_p90 = int(max_p90 * 1.2)
-    lines.append(f'    y-axis "Latency (μs)" 0 --> {y_max_p90}')
+        write_legend(fp, modes)
 
-    for mode in modes:
-        if mode not in summaries:
+        if num_low <= 1:
             continue
-        values = [
-            str(summaries[mode].get(c, {}).get("latency", {}).get("p90_us", 0))
-            for c in all_connections
-        ]
-        lines.append(f'    line "{mode}" [{", ".join(values)}]')
-
-    lines.append("```")
-    lines.extend(add_legend(modes))
-
-    # Latency p90 chart (low connections - first 4 points)
-    if len(low_connections) > 1:
-        lines.extend([
-            "",
-            "### p90 Latency (Low Connections)",
-            "",
-            "```mermaid",
-            "---",
-            "config:",
-            "    themeVariables:",
-            "        xyChart:",
-            f'            plotColorPalette: "{chart_colors}"',
-            "---",
-            "xychart-beta",
-            '    title "p90 Latency (Low Connection Counts)"',
-            f'    x-axis "Connections" [{", ".join(str(c) for c in low_connections)}]',
-        ])
-
-        max_p90_low = max(
-            summaries[mode].get(c, {}).get("latency", {}).get("p90_us", 0)
-            for mode in modes if mode in summaries
-            for c in low_connections
-        )
-        y_max_p90_low = int(max_p90_low * 1.2) if max_p90_low > 0 else 100
-        lines.append(f'    y-axis "Latency (μs)" 0 --> {y_max_p90_low}')
-
-        for mode in modes:
-            if mode not in summaries:
-                continue
-            values = [
-                str(summaries[mode].get(c, {}).get("latency", {}).get("p90_us", 0))
-                for c in low_connections
-            ]
-            lines.append(f'    line "{mode}" [{", ".join(values)}]')
 
-        lines.append("```")
-        lines.extend(add_legend(modes))
-
-        # Calculate DPDK latency improvement at last low-connection point
-        if "dpdk" in summaries and len(low_connections) > 0:
-            last_conn = low_connections[-1]
-            dpdk_lat = summaries["dpdk"].get(last_conn, {}).get("latency", {}).get("p90_us", 0)
-            other_lats = [
-                summaries[m].get(last_conn, {}).get("latency", {}).get("p90_us", 0)
-                for m in modes if m != "dpdk" and m in summaries
-            ]
-            if other_lats and dpdk_lat > 0:
-                best_other = min(lat for lat in other_lats if lat > 0) if any(lat > 0 for lat in other_lats) else 0
-                if best_other > 0:
-                    improvement = ((best_other - dpdk_lat) / best_other) * 100
-                    lines.append("")
-                    lines.append(f"**DPDK p90 latency improvement at {last_conn} connections: {improvement:+.1f}%** (positive = DPDK is faster)")
-
-    # Latency p99 chart
-    lines.extend([
-        "",
-        "## Latency Comparison (p99)",
-        "",
-        "```mermaid",
-        "---",
-        "config:",
-        "    themeVariables:",
-        "        xyChart:",
-        f'            plotColorPalette: "{chart_colors}"',
-        "---",
-        "xychart-beta",
-        '    title "p99 Latency by Connection Count"',
-        f'    x-axis "Connections" [{", ".join(str(c) for c in all_connections)}]',
-    ])
-
-    max_p99 = max(
-        r.get("latency", {}).get("p99_us", 0)
-        for results in summaries.values()
-        for r in results.values()
-    )
-    y_max_p99 = int(max_p99 * 1.2)
-    lines.append(f'    y-axis "Latency (μs)" 0 --> {y_max_p99}')
-
-    for mode in modes:
-        if mode not in summaries:
-            continue
-        values = [
-            str(summaries[mode].get(c, {}).get("latency", {}).get("p99_us", 0))
-            for c in all_connections
-        ]
-        lines.append(f'    line "{mode}" [{", ".join(values)}]')
-
-    lines.append("```")
-    lines.extend(add_legend(modes))
-
-    # Latency p99 chart (low connections - first 4 points)
-    if len(low_connections) > 1:
-        lines.extend([
-            "",
-            "### p99 Latency (Low Connections)",
-            "",
-            "```mermaid",
-            "---",
-            "config:",
-            "    themeVariables:",
-            "        xyChart:",
-            f'            plotColorPalette: "{chart_colors}"',
-            "---",
-            "xychart-beta",
-            '    title "p99 Latency (Low Connection Counts)"',
-            f'    x-axis "Connections" [{", ".join(str(c) for c in low_connections)}]',
-        ])
-
-        max_p99_low = max(
-            summaries[mode].get(c, {}).get("latency", {}).get("p99_us", 0)
-            for mode in modes if mode in summaries
-            for c in low_connections
+        max_lat_low = max(
+            v
+            for mode in modes if mode in rows
+            for v in rows[mode][pct][:num_low]
         )
-        y_max_p99_low = int(max_p99_low * 1.2) if max_p99_low > 0 else 100
-        lines.append(f'    y-axis "Latency (μs)" 0 --> {y_max_p99_low}')
-
-        for mode in modes:
-            if mode not in summaries:
-                continue
-            values = [
-                str(summaries[mode].get(c, {}).get("latency", {}).get("p99_us", 0))
-                for c in low_connections
-            ]
-            lines.append(f'    line "{mode}" [{", ".join(values)}]')
-
-        lines.append("```")
-        lines.extend(add_legend(modes))
+        fp.write(f"\n### {pct} Latency (Low Connections)\n\n".encode())
+        write_chart(
+            fp, f"{pct} Latency (Low Connection Counts)", "Latency (μs)",
+            0, int(max_lat_low * 1.2) if max_lat_low > 0 else 100, low_connections,
+            [(mode, rows[mode][pct][:num_low]) for mode in modes if mode in rows],
+            chart_colors,
+        )
+        write_legend(fp, modes)
 
         # Calculate DPDK latency improvement at last low-connection point
-        if "dpdk" in summaries and len(low_connections) > 0:
+        if "dpdk" in rows:
             last_conn = low_connections[-1]
-            dpdk_lat = summaries["dpdk"].get(last_conn, {}).get("latency", {}).get("p99_us", 0)
+            dpdk_lat = rows["dpdk"][pct][num_low - 1]
             other_lats = [
-                summaries[m].get(last_conn, {}).get("latency", {}).get("p99_us", 0)
-                for m in modes if m != "dpdk" and m in summaries
+                rows[m][pct][num_low - 1]
+                for m in modes if m != "dpdk" and m in rows
             ]
             if other_lats and dpdk_lat > 0:
                 best_other = min(lat for lat in other_lats if lat > 0) if any(lat > 0 for lat in other_lats) else 0
                 if best_other > 0:
                     improvement = ((best_other - dpdk_lat) / best_other) * 100
-                    lines.append("")
-                    lines.append(f"**DPDK p99 latency improvement at {last_conn} connections: {improvement:+.1f}%** (positive = DPDK is faster)")
+                    fp.write(f"\n**DPDK {pct} latency improvement at {last_conn} connections: {improvement:+.1f}%** (positive = DPDK is faster)\n".encode())
 
     # Raw data section
-    lines.extend([
-        "",
-        "## Raw Data",
-        "",
-    ])
+    fp.write(b"\n## Raw Data\n")
 
     for mode in modes:
         if mode not in summaries:
             continue
-        lines.append(f"### {mode}")
-        lines.append("")
-        lines.append("<details>")
-        lines.append("<summary>Click to expand</summary>")
-        lines.append("")
-        lines.append("```json")
-        summary = load_summary(mode)
-        lines.append(json.dumps(summary, indent=2))
-        lines.append("```")
-        lines.append("")
-        lines.append("</details>")
-        lines.append("")
-
-    return "\n".join(lines)
+        fp.write((
+            f"\n### {mode}\n"
+            "\n"
+            "<details>\n"
+            "<summary>Click to expand</summary>\n"
+            "\n"
+            "```json\n"
+        ).encode())
+        # Embed summary.json verbatim; its bytes need no encoding
+        fp.write(raw_summaries[mode])
+        fp.write(
+            b"\n```\n"
+            b"\n"
+            b"</details>\n"
+        )
 
 
 def main():
@@ -600,14 +401,17 @@ def main():
         else:
             output_file = BENCHMARKS_DIR / f"BENCHMARK_{dir_name}.md"
     
-    if not BENCHMARKS_DIR.exists():
+    modes = discover_modes()
+    if modes is None:
         print(f"Error: Benchmarks directory not found: {BENCHMARKS_DIR}")
         return 1
 
-    content = generate_markdown()
+    # Load everything before opening (and truncating) the output file, so a
+    # bad summary.json leaves any existing report untouched
+    summaries, raw_summaries = load_summaries(modes)
 
-    with open(output_file, "w") as f:
-        f.write(content)
+    with open(output_file, "wb", buffering=1 << 20) as f:
+        write_markdown(f, modes, summaries, raw_summaries)
 
     print(f"Generated: {output_file}")
     return 0
@@ -4,30 +4,58 @@ Dynamic Ansible inventory that reads VM IPs from Azure deployment outputs.
 Reads from: build/tests/infra/azure-deployment-outputs.json
 """
 
-import json
 import os
 import sys
 from pathlib import Path
 
+# Prefer orjson, then ujson (both C extensions), falling back to the stdlib
+# json module when neither is installed. All three print identical output.
+try:
+    import orjson
+
+    _loads = orjson.loads
+
+    def _dumps(obj) -> str:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode()
+except ImportError:
+    try:
+        import ujson
+
+        _loads = ujson.loads
+
+        def _dumps(obj) -> str:
+            # ujson escapes "/" by default; json and orjson do not
+            return ujson.dumps(obj, indent=2, escape_forward_slashes=False)
+    except ImportError:
+        import json
+
+        _loads = json.loads
+
+        def _dumps(obj) -> str:
+            return json.dumps(obj, indent=2)
+
 def get_outputs_file():
     """Find the Azure deployment outputs file."""
+    # An explicit OUTPUTS_FILE takes precedence over the common locations
+    env_path = os.environ.get("OUTPUTS_FILE")
+    if env_path and (path := Path(env_path)).exists():
+        return path
+
     # Try relative to this script (tests/e2e -> project root -> build/tests/infra)
     script_dir = Path(__file__).parent
     project_root = script_dir.parent.parent
     
     # Check common locations
-    candidates = [
-        project_root / "build" / "tests" / "infra" / "azure-deployment-outputs.json",
-        project_root / "build" / "azure-deployment-outputs.json",
-        Path(os.environ.get("OUTPUTS_FILE", "")),
-    ]
+    default_path = project_root / "build" / "tests" / "infra" / "azure-deployment-outputs.json"
+    if default_path.exists():
+        return default_path
     
-    for path in candidates:
-        if path and path.exists():
-            return path
+    path = project_root / "build" / "azure-deployment-outputs.json"
+    if path.exists():
+        return path
     
     # Default path for error message
-    return candidates[0]
+    return default_path
 
 def load_inventory():
     """Load inventory from Azure deployment outputs."""
@@ -39,9 +67,9 @@ def load_inventory():
         return empty_inventory()
     
     try:
-        with open(outputs_file) as f:
-            outputs = json.load(f)
-    except json.JSONDecodeError as e:
+        with open(outputs_file, "rb") as f:
+            outputs = _loads(f.read())
+    except ValueError as e:
         sys.stderr.write(f"Error parsing {outputs_file}: {e}\n")
         return empty_inventory()
     
@@ -103,10 +131,11 @@ def empty_inventory():
 def main():
     if len(sys.argv) == 2 and sys.argv[1] == "--list":
         inventory = load_inventory()
-        print(json.dumps(inventory, indent=2))
+        print(_dumps(inventory))
     elif len(sys.argv) == 3 and sys.argv[1] == "--host":
-        # Return empty dict for host vars (already in _meta)
-        print(json.dumps({}))
+        # Return empty dict for host vars (already in _meta); no need to
+        # read the outputs file
+        print("{}")
     else:
         sys.stderr.write("Usage: inventory.py --list | --host <hostname>\n")
         sys.exit(1)
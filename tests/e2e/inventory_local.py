@@ -4,35 +4,63 @@ Dynamic Ansible inventory for local QEMU/KVM VMs.
 Gets VM IPs from libvirt DHCP leases.
 """
 
-import json
 import subprocess
 import sys
-import re
+
+# Prefer orjson, then ujson (both C extensions), falling back to the stdlib
+# json module when neither is installed. All three print identical output.
+try:
+    import orjson
+
+    def _dumps(obj) -> str:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode()
+except ImportError:
+    try:
+        import ujson
+
+        def _dumps(obj) -> str:
+            # ujson escapes "/" by default; json and orjson do not
+            return ujson.dumps(obj, indent=2, escape_forward_slashes=False)
+    except ImportError:
+        import json
+
+        def _dumps(obj) -> str:
+            return json.dumps(obj, indent=2)
 
 def get_dhcp_leases():
-    """Get DHCP leases from libvirt default network."""
+    """Get DHCP leases from libvirt default network as undecoded bytes."""
     try:
         result = subprocess.run(
             ["virsh", "net-dhcp-leases", "default"],
-            capture_output=True, text=True, check=True
+            capture_output=True, check=True
         )
         return result.stdout
     except (subprocess.CalledProcessError, FileNotFoundError) as e:
         sys.stderr.write(f"Error getting DHCP leases: {e}\n")
-        return ""
+        return b""
+
+def lease_ip(parts):
+    """Return the IPv4 address (without CIDR suffix) from a lease row's columns."""
+    for part in parts:
+        ip = part.partition(b"/")[0]
+        if ip.count(b".") == 3:
+            return ip.decode()
+    return None
 
 def parse_leases(output):
-    """Parse virsh net-dhcp-leases output."""
+    """Parse virsh net-dhcp-leases output (bytes)."""
     vms = {}
     for line in output.splitlines():
-        if "dpdk-vm1" in line:
-            match = re.search(r'(\d+\.\d+\.\d+\.\d+)', line)
-            if match:
-                vms["vm1"] = match.group(1)
-        elif "dpdk-vm2" in line:
-            match = re.search(r'(\d+\.\d+\.\d+\.\d+)', line)
-            if match:
-                vms["vm2"] = match.group(1)
+        parts = line.split()
+        if b"dpdk-vm1" in parts:
+            vm = "vm1"
+        elif b"dpdk-vm2" in parts:
+            vm = "vm2"
+        else:
+            continue
+        ip = lease_ip(parts)
+        if ip:
+            vms[vm] = ip
     return vms
 
 def load_inventory():
@@ -88,10 +116,10 @@ def empty_inventory():
 def main():
     if len(sys.argv) == 2 and sys.argv[1] == "--list":
         inventory = load_inventory()
-        print(json.dumps(inventory, indent=2))
+        print(_dumps(inventory))
     elif len(sys.argv) == 3 and sys.argv[1] == "--host":
         # Return empty dict for host-specific queries
-        print(json.dumps({}))
+        print("{}")
     else:
         sys.stderr.write("Usage: inventory_local.py --list | --host <hostname>\n")
         sys.exit(1)